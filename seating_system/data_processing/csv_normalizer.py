@@ -9,19 +9,58 @@ Purpose:
 - Sort by subject code
 """
 
+import hashlib
 import os
+import numpy as np
 import pandas as pd
 from data_processing.validators import validate_normalized_csv
 
 
+# Bump whenever the normalized output changes for the same input,
+# so cached outputs from older normalizer logic are regenerated
+NORMALIZER_VERSION = b"normalizer-v1"
+
+
+def _file_digest(path: str) -> str:
+    """Return the versioned BLAKE2b hex digest of a file, read in 1 MiB chunks."""
+    digest = hashlib.blake2b(NORMALIZER_VERSION)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def normalize_and_sort_csv(input_file_path: str, output_file_path: str) -> None:
     if not os.path.exists(input_file_path):
         raise FileNotFoundError(f"Input file not found: {input_file_path}")
 
+    # Skip all work if the input is byte-identical to the last run
+    input_digest = _file_digest(input_file_path)
+    digest_path = output_file_path + ".sha"
+
+    if os.path.exists(digest_path):
+        with open(digest_path) as f:
+            cached_digest = f.read().strip()
+
+        if cached_digest == input_digest and os.path.exists(output_file_path):
+            print("Input unchanged since last run, skipping normalization.")
+            print(f"Output saved to: {output_file_path}")
+            return
+
+        # The output is about to be rewritten; drop the old digest so an
+        # interrupted run can never be mistaken for a finished one
+        os.remove(digest_path)
+
     print("Reading CSV file...")
 
+    # Read subject columns as strings so codes never pick up a float '.0'.
+    # The header comes from the same reader, so duplicate names are
+    # mangled (Sub1, Sub1.1) the same way in both reads.
+    header = pd.read_csv(input_file_path, nrows=0).columns
+    subject_dtypes = {c: "string" for c in header if c.startswith("Sub")}
+
     # Your CSV is already clean and comma-separated
-    df = pd.read_csv(input_file_path)
+    df = pd.read_csv(input_file_path, dtype=subject_dtypes)
 
     print("Available columns:", list(df.columns))
 
@@ -48,42 +87,45 @@ def normalize_and_sort_csv(input_file_path: str, output_file_path: str) -> None:
 
     print("Normalizing data (one row per student per subject)...")
 
-    normalized_rows = []
-
-    for _, row in df.iterrows():
-        for sub_col in subject_columns:
-            subject_code = row[sub_col]
+    # Flatten the [students x subjects] grid row by row, keeping filled cells
+    subjects = df[subject_columns].to_numpy(dtype=object)
+    subject_codes = np.char.strip(subjects.astype(str))
+    valid = pd.notna(subjects) & (subject_codes != "")
 
-            if pd.notna(subject_code) and str(subject_code).strip():
-                normalized_rows.append({
-                    "register_no": row["Register No"],
-                    "student_name": row["Student Name"],
-                    "department": row["Branch"],
-                    "semester": int(row["Semester"]),
-                    "subject_code": str(subject_code).strip().replace(".0", "")
-                })
+    row_ix = np.repeat(np.arange(len(df)), len(subject_columns))[valid.ravel()]
 
-    if not normalized_rows:
+    if row_ix.size == 0:
         raise ValueError("No valid subject registrations found.")
 
-    normalized_df = pd.DataFrame(normalized_rows)
-
-    # FIX: enforce subject_code as string identifier
-    normalized_df["subject_code"] = normalized_df["subject_code"].astype(str).str.strip()
+    normalized_df = pd.DataFrame({
+        "register_no": df["Register No"].to_numpy()[row_ix],
+        "student_name": df["Student Name"].to_numpy()[row_ix],
+        "department": df["Branch"].to_numpy()[row_ix],
+        "semester": df["Semester"].to_numpy(dtype=int)[row_ix],
+        "subject_code": subject_codes[valid]
+    })
+
+    # FIX: enforce subject_code as string identifier (strip Excel-style '.0')
+    normalized_df["subject_code"] = normalized_df["subject_code"].str.replace(
+        r"\.0$", "", regex=True
+    )
 
     validate_normalized_csv(normalized_df)
 
     print("Sorting by subject code...")
 
-    normalized_df.sort_values(
+    normalized_df = normalized_df.sort_values(
         by="subject_code",
-        inplace=True
+        kind="mergesort"
     )
 
     os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
 
     normalized_df.to_csv(output_file_path, index=False)
 
+    with open(digest_path, "w") as f:
+        f.write(input_digest)
+
     print("✅ Normalization and sorting completed successfully.")
     print(f"Output saved to: {output_file_path}")
 
@@ -6,7 +6,8 @@ from datetime import datetime
 def prepare_exam_session(
     normalized_csv_path: str,
     output_dir: str,
-    exam_config: dict
+    exam_config: dict,
+    use_parquet: bool = True
 ) -> str:
     """
     Prepare a session-specific, constraint-ready dataset
@@ -16,6 +17,7 @@ def prepare_exam_session(
         normalized_csv_path (str): Path to normalized CSV
         output_dir (str): Directory to save prepared dataset
         exam_config (dict): Exam configuration parameters
+        use_parquet (bool): Also write a parquet copy for the allocator
 
     Returns:
         str: Path to generated prepared CSV
@@ -24,8 +26,6 @@ def prepare_exam_session(
     # ----------------------------
     # Step 1: Load normalized data
     # ----------------------------
-    df = pd.read_csv(normalized_csv_path)
-
     required_cols = {
         "register_no",
         "student_name",
@@ -34,6 +34,17 @@ def prepare_exam_session(
         "subject_code"
     }
 
+    # Read only the schema columns with explicit dtypes (skips inference)
+    df = pd.read_csv(
+        normalized_csv_path,
+        usecols=lambda c: c in required_cols,
+        dtype={
+            "register_no": "int64",
+            "department": "category",
+            "subject_code": "category"
+        }
+    )
+
     if not required_cols.issubset(df.columns):
         raise ValueError("Normalized CSV schema mismatch.")
 
@@ -50,7 +61,12 @@ def prepare_exam_session(
     # ----------------------------
     # Step 3: Filter by subjects
     # ----------------------------
-    session_df = df[df["subject_code"].isin(subject_codes)].copy()
+    # Match on category codes: integer comparison instead of string hashing
+    subject_index = pd.Index(list(subject_codes))
+    category_ix = df["subject_code"].cat.categories.get_indexer(subject_index)
+    session_mask = df["subject_code"].cat.codes.isin(category_ix[category_ix >= 0])
+
+    session_df = df[session_mask].copy()
 
     missing_subjects = subject_codes - set(session_df["subject_code"].unique())
 
@@ -103,6 +119,16 @@ def prepare_exam_session(
 
     session_df.to_csv(output_path, index=False)
 
+    # Parquet cache next to the CSV: keeps dtypes, skips re-parsing later
+    if use_parquet:
+        try:
+            session_df.to_parquet(
+                os.path.splitext(output_path)[0] + ".parquet",
+                index=False
+            )
+        except ImportError:
+            pass
+
     return output_path
 
 
@@ -1,8 +1,21 @@
+import csv
+import heapq
 import os
+import numpy as np
 import pandas as pd
 from collections import defaultdict, deque
 
 
+OUTPUT_COLUMNS = (
+    "register_no",
+    "student_name",
+    "department",
+    "subject_code",
+    "hall_id",
+    "seat_number"
+)
+
+
 # ============================================================
 # Public Orchestrator
 # ============================================================
@@ -16,7 +29,24 @@ def allocate_seating(
     # ----------------------------
     # Step 1: Load prepared data
     # ----------------------------
-    df = pd.read_csv(prepared_csv_path)
+    # Prefer the parquet cache written by prepare_exam_session (dtypes intact)
+    parquet_path = os.path.splitext(prepared_csv_path)[0] + ".parquet"
+
+    if (
+        os.path.exists(parquet_path)
+        and os.path.getmtime(parquet_path) >= os.path.getmtime(prepared_csv_path)
+    ):
+        df = pd.read_parquet(parquet_path)
+    else:
+        # Categorical columns: small integer codes instead of per-row strings
+        df = pd.read_csv(
+            prepared_csv_path,
+            dtype={
+                "register_no": "int64",
+                "department": "category",
+                "subject_code": "category"
+            }
+        )
 
     required_cols = {
         "register_no",
@@ -29,8 +59,12 @@ def allocate_seating(
     if not required_cols.issubset(df.columns):
         raise ValueError("Prepared CSV schema mismatch.")
 
-    df["register_no"] = df["register_no"].astype(int)
-    df["subject_code"] = df["subject_code"].astype(str)
+    # Pre-sort once so every subject group is already ordered
+    df.sort_values(
+        by=["subject_code", "department", "register_no"],
+        kind="mergesort",
+        inplace=True
+    )
 
     # ----------------------------
     # Step 2: Read configuration
@@ -67,16 +101,16 @@ def allocate_seating(
     # ----------------------------
     # Step 6: Generate output
     # ----------------------------
-    output_rows = _generate_output_rows(halls)
-    output_df = pd.DataFrame(output_rows)
-
     os.makedirs(output_dir, exist_ok=True)
     exam_date = df.iloc[0]["exam_date"]
     session = df.iloc[0]["session"]
 
     filename = f"seat_allocated_exam_session_{exam_date}_{session}.csv"
     output_path = os.path.join(output_dir, filename)
-    output_df.to_csv(output_path, index=False)
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(OUTPUT_COLUMNS)
+        writer.writerows(_generate_output_rows(halls))
 
     return output_path
 
@@ -95,26 +129,28 @@ def _allocate_students_to_halls_hybrid(
     for hid in range(1, number_of_halls + 1):
         halls.append({
             "hall_id": hid,
-            "occupied": 0,
-            "subject_counts": defaultdict(int),
             "seats": []
         })
 
-    # Group & sort students per subject
-    subject_groups = defaultdict(list)
-    for _, row in df.iterrows():
-        subject_groups[row["subject_code"]].append(row)
-
-    for subject in subject_groups:
-        subject_groups[subject].sort(
-            key=lambda r: (r["department"], r["register_no"])
-        )
-
+    # Group students per subject (df is already sorted).
+    # Queues are keyed by category code; labels are only used for output.
+    subject_labels = df["subject_code"].cat.categories
     subject_queues = {
-        s: deque(students)
-        for s, students in subject_groups.items()
+        s: deque(students.itertuples(index=False, name="Row"))
+        for s, students in df.groupby(
+            df["subject_code"].cat.codes, sort=False
+        )
     }
 
+    # Per-hall counters as dense arrays: occupied[hall], subject_counts[hall, subject]
+    occupied = np.zeros(number_of_halls, dtype=np.int32)
+    subject_counts = np.zeros(
+        (number_of_halls, len(subject_labels)), dtype=np.int32
+    )
+
+    # Direct references to each hall's seat list for the placement loop
+    hall_seats = [hall["seats"] for hall in halls]
+
     hall_index = 0
 
     while any(subject_queues.values()):
@@ -123,40 +159,66 @@ def _allocate_students_to_halls_hybrid(
                 continue
 
             student = queue[0]
-            placed = False
 
-            for attempt in range(number_of_halls):
-                hall = halls[(hall_index + attempt) % number_of_halls]
+            h = _place_student(
+                subject_counts,
+                occupied,
+                subject,
+                hall_index,
+                hall_capacity,
+                max_subject_per_hall
+            )
+
+            if h < 0:
+                raise ValueError(
+                    f"Cannot allocate subject {subject_labels[subject]}; "
+                    "constraints too strict."
+                )
+
+            hall_seats[h].append({
+                "register_no": student.register_no,
+                "student_name": student.student_name,
+                "department": student.department,
+                "subject_code": student.subject_code
+            })
 
-                if hall["occupied"] >= hall_capacity:
-                    continue
+            queue.popleft()
 
-                if hall["subject_counts"][subject] >= max_subject_per_hall:
-                    continue
+            if occupied[h] >= hall_capacity:
+                hall_index = (h + 1) % number_of_halls
 
-                hall["seats"].append({
-                    "register_no": student["register_no"],
-                    "student_name": student["student_name"],
-                    "department": student["department"],
-                    "subject_code": subject
-                })
+    return halls
 
-                hall["occupied"] += 1
-                hall["subject_counts"][subject] += 1
-                queue.popleft()
 
-                if hall["occupied"] >= hall_capacity:
-                    hall_index = (halls.index(hall) + 1) % number_of_halls
+def _place_student(
+    subject_counts,
+    occupied,
+    subject,
+    hall_index,
+    hall_capacity,
+    max_subject_per_hall
+):
+    """
+    Take the first hall, round-robin from hall_index, that has a free seat
+    and is under the per-subject limit. Updates the counters in place and
+    returns the hall index, or -1 if no hall fits.
+    """
+    number_of_halls = occupied.shape[0]
 
-                placed = True
-                break
+    for attempt in range(number_of_halls):
+        h = (hall_index + attempt) % number_of_halls
 
-            if not placed:
-                raise ValueError(
-                    f"Cannot allocate subject {subject}; constraints too strict."
-                )
+        if occupied[h] >= hall_capacity:
+            continue
 
-    return halls
+        if subject_counts[h, subject] >= max_subject_per_hall:
+            continue
+
+        occupied[h] += 1
+        subject_counts[h, subject] += 1
+        return h
+
+    return -1
 
 
 # ============================================================
@@ -175,45 +237,52 @@ def _reorder_hall_seats_by_bench(seats):
     for s in seats:
         dept_queues[s["department"]].append(s)
 
-    reordered = []
+    # Max-heap on remaining seats; ties keep first-seen department order
+    heap = [
+        (-len(queue), order, queue)
+        for order, queue in enumerate(dept_queues.values())
+    ]
+    heapq.heapify(heap)
 
-    while dept_queues:
-        for d in list(dept_queues):
-            if not dept_queues[d]:
-                del dept_queues[d]
+    reordered = []
 
-        if not dept_queues:
-            break
+    while heap:
+        _, order, queue = heapq.heappop(heap)
 
-        depts = sorted(dept_queues, key=lambda d: len(dept_queues[d]), reverse=True)
+        if heap:
+            _, other_order, other_queue = heapq.heappop(heap)
+            reordered.append(queue.popleft())
+            reordered.append(other_queue.popleft())
 
-        if len(depts) >= 2:
-            reordered.append(dept_queues[depts[0]].popleft())
-            reordered.append(dept_queues[depts[1]].popleft())
+            if other_queue:
+                heapq.heappush(heap, (-len(other_queue), other_order, other_queue))
         else:
-            d = depts[0]
-            reordered.append(dept_queues[d].popleft())
-            if dept_queues[d]:
-                reordered.append(dept_queues[d].popleft())
+            reordered.append(queue.popleft())
+            if queue:
+                reordered.append(queue.popleft())
+
+        if queue:
+            heapq.heappush(heap, (-len(queue), order, queue))
 
     return reordered
 
 
+def _blank_if_missing(value):
+    # csv.writer would write NaN as 'nan'; pandas wrote an empty cell
+    return "" if pd.isna(value) else value
+
+
 def _generate_output_rows(halls):
-    rows = []
     for hall in halls:
-        seat_no = 1
-        for seat in hall["seats"]:
-            rows.append({
-                "register_no": seat["register_no"],
-                "student_name": seat["student_name"],
-                "department": seat["department"],
-                "subject_code": seat["subject_code"],
-                "hall_id": hall["hall_id"],
-                "seat_number": seat_no
-            })
-            seat_no += 1
-    return rows
+        for seat_no, seat in enumerate(hall["seats"], start=1):
+            yield (
+                seat["register_no"],
+                _blank_if_missing(seat["student_name"]),
+                _blank_if_missing(seat["department"]),
+                _blank_if_missing(seat["subject_code"]),
+                hall["hall_id"],
+                seat_no
+            )
 
 
 # ============================================================
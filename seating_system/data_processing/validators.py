@@ -27,10 +27,13 @@ def validate_normalized_csv(df: pd.DataFrame) -> None:
     if df["subject_code"].isna().any():
         raise ValueError("Normalized data contains empty subject_code")
 
-    if df["subject_code"].astype(str).str.strip().eq("").any():
+    # Cast and strip once; reused by both string checks below
+    subject_codes = df["subject_code"].astype("string").str.strip()
+
+    if subject_codes.eq("").any():
         raise ValueError("Normalized data contains blank subject_code")
 
-    if df["subject_code"].astype(str).str.contains(r"\.0$", regex=True).any():
+    if subject_codes.str.endswith(".0", na=False).any():
         raise ValueError(
             "subject_code contains Excel-style '.0' values (data not canonicalized)"
         )
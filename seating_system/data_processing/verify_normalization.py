@@ -15,28 +15,27 @@ subject_columns = [c for c in df_input.columns if c.startswith("Sub")]
 # ----------------------------
 print("1.1 Verifying aggregated per-student subject counts...")
 
-failed_students = []
-
-# Group input rows by Register No
-for reg_no, group in df_input.groupby("Register No"):
-
-    # Count ALL valid subjects across ALL rows for this student
-    input_subject_count = 0
-    for _, row in group.iterrows():
-        input_subject_count += sum(
-            pd.notna(row[col]) and str(row[col]).strip() != ""
-            for col in subject_columns
-        )
-
-    # Count output rows for this student
-    output_subject_count = len(
-        df_output[df_output["register_no"] == reg_no]
-    )
-
-    if input_subject_count != output_subject_count:
-        failed_students.append(
-            (reg_no, input_subject_count, output_subject_count)
-        )
+# Count ALL valid subjects per input row, then total them per student
+subjects = df_input[subject_columns]
+valid_subjects = subjects.notna() & subjects.astype(str).apply(
+    lambda col: col.str.strip().ne("")
+)
+input_counts = valid_subjects.sum(axis=1).groupby(df_input["Register No"]).sum()
+
+# Count output rows per student
+output_counts = (
+    df_output.groupby("register_no")
+    .size()
+    .reindex(input_counts.index, fill_value=0)
+)
+
+mismatched = input_counts != output_counts
+
+failed_students = list(zip(
+    input_counts.index[mismatched].tolist(),
+    input_counts[mismatched].tolist(),
+    output_counts[mismatched].tolist()
+))
 
 if not failed_students:
     print("✅ Aggregated per-student subject count verification PASSED\n")